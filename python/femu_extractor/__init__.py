@@ -1,5 +1,5 @@
 from .extractor import Extractor, ExtractionItem, extract
-from .binwalkInterface import DetectedFile, ExtractedFile, runBinwalk, checkFile, checkOutputDirectory
+from .binwalkInterface import DetectedFile, ExtractedFile, runBinwalk, runBinwalkBatch, checkFile, checkOutputDirectory
 
 __all__ = [
     "Extractor",
@@ -8,6 +8,7 @@ __all__ = [
     "DetectedFile",
     "ExtractedFile",
     "runBinwalk",
+    "runBinwalkBatch",
     "checkFile",
     "checkOutputDirectory",
 ]
@@ -1,41 +1,51 @@
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
 from femu_extractor._lib import run_binwalk as rust_run_binwalk
 
 # Re-export classes for backward compatibility
-__all__ = ['DetectedFile', 'ExtractedFile', 'runBinwalk', 'checkFile', 'checkOutputDirectory']
+__all__ = ['DetectedFile', 'ExtractedFile', 'runBinwalk', 'runBinwalkBatch', 'checkFile', 'checkOutputDirectory']
 
 logger = logging.getLogger(__name__)
 
-class ExtractedFile:
+# Bound once at import; checkFile and checkOutputDirectory run on every runBinwalk call
+_isfile, _isdir, _abspath, _access = os.path.isfile, os.path.isdir, os.path.abspath, os.access
+_R_OK, _W_OK = os.R_OK, os.W_OK
+
+class ExtractedFile(NamedTuple):
     """Details about the extraction of a detected file"""
-    def __init__(self, size: int, success: bool, extractor: str, outputDir: str):
-        self.size = size
-        self.success = success
-        self.extractor = extractor
-        self.outputDir = outputDir
-        
-    def __repr__(self):
-        return (f"ExtractedFile(size={self.size}, success={self.success}, "
-                f"extractor='{self.extractor}', outputDir='{self.outputDir}')")
+    size: int
+    success: bool
+    extractor: str
+    outputDir: str
 
 
-class DetectedFile:
+class DetectedFile(NamedTuple):
     """A file that was detected by binwalk during analysis"""
-    def __init__(self, offset: int, id: str, size: int, confidence: float, description: str, extractionDetails: ExtractedFile | None = None):
-        self.offset = offset
-        self.id = id
-        self.size = size
-        self.confidence = confidence
-        self.description = description
-        self.extractionDetails = extractionDetails
-        
-    def __repr__(self):
-        return (f"DetectedFile(offset={self.offset}, id={self.id}, size={self.size}, "
-                f"confidence={self.confidence}, description='{self.description}', "
-                f"extractionDetails={self.extractionDetails})")
+    offset: int
+    id: str
+    size: int
+    confidence: float
+    description: str
+    extractionDetails: ExtractedFile | None = None
+
+
+def _toDetectedFile(result: tuple) -> DetectedFile:
+    """
+    Convert a result tuple returned by the Rust binding to a DetectedFile.
+
+    The binding lays each tuple out in DetectedFile field order, with the
+    extraction details either None or a tuple in ExtractedFile field order.
+
+    :param result: Tuple describing a single binwalk match
+    :return: DetectedFile object
+    """
+    extraction = result[5]
+    if extraction is None:
+        return DetectedFile._make(result)
+    return DetectedFile._make(result[:5] + (ExtractedFile._make(extraction),))
 
-        
 
 def checkFile(filePath: str) -> bool:
     """
@@ -44,15 +54,13 @@ def checkFile(filePath: str) -> bool:
     :param filePath: Path to the file to check.
     :return: True if the file exists and is readable, False otherwise.
     """
-    if not os.path.isfile(filePath):
+    if not _isfile(filePath):
         logger.error(f"File not found: {filePath}")
         return False
     
-    # Get full path of file 
-    fullPath = os.path.abspath(filePath)
     # Check that the user has read permissions on the file
-    if not os.access(fullPath, os.R_OK):
-        logger.error(f"User does not have read permissions on file: {fullPath}")
+    if not _access(filePath, _R_OK):
+        logger.error(f"User does not have read permissions on file: {_abspath(filePath)}")
         return False
     
     return True
@@ -65,11 +73,11 @@ def checkOutputDirectory(outputDirectory: str) -> bool:
     :param outputDirectory: Path to the output directory.
     :return: True if the directory exists and is writable, False otherwise.
     """
-    if not os.path.isdir(outputDirectory):
+    if not _isdir(outputDirectory):
         logger.error(f"Output directory does not exist: {outputDirectory}")
         return False
     
-    if not os.access(outputDirectory, os.W_OK):
+    if not _access(outputDirectory, _W_OK):
         logger.error(f"User does not have write permissions on the output directory: {outputDirectory}")
         return False
     
@@ -83,8 +91,8 @@ def runBinwalk(
     recursive: bool = False,
     searchAll: bool = True,
     logFile: str = "",
-    excludeSignatures: list[str] = [],
-    includeSignatures: list[str] = [],
+    excludeSignatures: list[str] | None = None,
+    includeSignatures: list[str] | None = None,
     outputDirectory: str = "",
 ) -> list[DetectedFile]:
     """
@@ -108,42 +116,20 @@ def runBinwalk(
         return []
     
     try:
-        # Call the Rust binwalk implementation (returns list of dicts)
-        result_dicts = rust_run_binwalk(
+        # Call the Rust binwalk implementation (returns list of tuples)
+        result_tuples = rust_run_binwalk(
             file_path=filePath,
             verbose=verbose,
             extract=extract,
             recursive=recursive,
             search_all=searchAll,
-            exclude_signatures=excludeSignatures if excludeSignatures else None,
-            include_signatures=includeSignatures if includeSignatures else None,
-            output_directory=outputDirectory if outputDirectory else None,
+            exclude_signatures=excludeSignatures or None,
+            include_signatures=includeSignatures or None,
+            output_directory=outputDirectory or None,
         )
         
-        # Convert dictionaries to DetectedFile objects
-        detected_files = []
-        for result_dict in result_dicts:
-            # Extract extraction details if present
-            extraction_details = None
-            if result_dict.get("extraction_details"):
-                ext_dict = result_dict["extraction_details"]
-                extraction_details = ExtractedFile(
-                    size=ext_dict.get("size", 0),
-                    success=ext_dict.get("success", False),
-                    extractor=ext_dict.get("extractor", ""),
-                    outputDir=ext_dict.get("output_dir", "")
-                )
-            
-            # Create DetectedFile object from dictionary
-            df = DetectedFile(
-                offset=result_dict["offset"],
-                id=result_dict["id"],
-                size=result_dict["size"],
-                confidence=result_dict["confidence"],
-                description=result_dict["description"],
-                extractionDetails=extraction_details
-            )
-            detected_files.append(df)
+        # Convert tuples to DetectedFile objects
+        detected_files = [_toDetectedFile(result) for result in result_tuples]
         
         return detected_files
         
@@ -151,3 +137,21 @@ def runBinwalk(
         logger.error(f"Binwalk analysis failed: {e}")
         raise RuntimeError(f"Binwalk analysis failed: {e}") from e
 
+
+def runBinwalkBatch(filePaths: list[str], maxWorkers: int | None = None, **kwargs) -> list[list[DetectedFile]]:
+    """
+    Run binwalk analysis on several files concurrently.
+
+    The native binwalk call releases the GIL, so files are analyzed in
+    parallel on a thread pool.
+
+    :param filePaths: Paths to the firmware files to analyze
+    :param maxWorkers: Maximum number of worker threads (default: number of CPUs)
+    :param kwargs: Keyword arguments passed through to runBinwalk for every file
+    :return: List of DetectedFile lists, in the same order as filePaths
+    """
+    if not filePaths:
+        return []
+
+    with ThreadPoolExecutor(max_workers=maxWorkers or os.cpu_count()) as executor:
+        return list(executor.map(lambda filePath: runBinwalk(filePath, **kwargs), filePaths))
@@ -7,13 +7,24 @@ e.g. 'extractor.py <input> <output>'.
 """
 
 import argparse
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import functools
+import gc
 import hashlib
 import logging
+import mmap
 import multiprocessing
+import multiprocessing.util
 import os
+import queue
+import re
 from stat import S_ISREG
 import shutil
+import subprocess
 import tempfile
+import threading
 import traceback
 
 import magic
@@ -29,6 +40,32 @@ ubiSignatures    = ["ubi", "ubifs"]
 compressedSignatures = ["zstd", "zlib", "xz", "gzip", "bzip2", "lzop", "lzma", "lzfse", "lz4", "compressd"]
 archiveSignatures = ["zip", "rar", "tarball", "cab", "cpio", "7zip"]
 
+# work-around issue with binwalk signature definitions for ubi
+filesystemSignatures = ubiSignatures + rootfsSignatures
+
+def _copy_file_range(ifd, ofd, offset, size):
+    """
+    Copies up to size bytes from offset in ifd to ofd using copy_file_range().
+    """
+    return os.copy_file_range(ifd, ofd, size, offset)
+
+def _sendfile(ifd, ofd, offset, size):
+    """
+    Copies up to size bytes from offset in ifd to ofd using sendfile().
+    """
+    return os.sendfile(ofd, ifd, offset, size)
+
+@functools.lru_cache(maxsize=None)
+def _get_malloc_trim():
+    """
+    Returns glibc's malloc_trim(), or None with other C libraries.
+    """
+    try:
+        import ctypes
+        return ctypes.CDLL("libc.so.6").malloc_trim
+    except (OSError, AttributeError):
+        return None
+
 class Extractor(object):
     """
     Class that extracts kernels and filesystems from firmware images, given an
@@ -37,16 +74,26 @@ class Extractor(object):
 
     # Directories that define the root of a UNIX filesystem, and the
     # appropriate threshold condition
-    UNIX_DIRS = ["bin", "etc", "dev", "home", "lib", "mnt", "opt", "root",
-                 "run", "sbin", "tmp", "usr", "var"]
+    UNIX_DIRS = frozenset(["bin", "etc", "dev", "home", "lib", "mnt", "opt",
+                           "root", "run", "sbin", "tmp", "usr", "var"])
     UNIX_THRESHOLD = 4
 
-    # Lock to prevent concurrent access to visited set. Unfortunately, must be
-    # static because it cannot be pickled or passed as instance attribute.
-    visited_lock = multiprocessing.Lock()
+    # Loaded magic handles, keyed by whether they return MIME types. Class
+    # attributes are not pickled, so each worker process loads its own.
+    _magic_cache = {}
+
+    # Worker pool of this process as (PID, number of workers, pool). The pool
+    # is shared by all instances, so that repeated extractions reuse the same
+    # workers along with their database connections and magic handles. Only
+    # one pool is kept; asking for a different number of workers replaces it.
+    _pool = None
+
+    # Whether this process is a pool worker, set by the pool initializer
+    _is_worker = False
 
     def __init__(self, indir, outdir=None, rootfs=True, kernel=True,
-                 numproc=True, server=None, brand=None, port=5432, quiet=False):
+                 numproc=True, server=None, brand=None, port=5432, quiet=False,
+                 jobs=None, tmpfs=False):
         # Input firmware update file or directory
         self._input = os.path.abspath(indir)
         # Output firmware directory
@@ -65,10 +112,30 @@ class Extractor(object):
         self.database = server
         self.port = port
 
-        # Worker pool.
-        self._pool = multiprocessing.Pool() if numproc else None
+        if jobs is not None and jobs < 1:
+            raise ValueError("jobs must be at least 1, got %d" % jobs)
+
+        # CPUs this process may run on, which the workers are pinned across
+        cpus = len(os.sched_getaffinity(0)) if \
+            hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
 
-        # Set containing MD5 checksums of visited items
+        # Whether to use the worker pool, with one worker per CPU unless capped
+        # by jobs. The pool is only started once extract() needs it.
+        workers = min(jobs, cpus) if jobs else cpus
+        self.numproc = numproc
+
+        # Number of items extracted concurrently
+        self.workers = workers if numproc else 1
+
+        # Compression threads per tarball, split between concurrent workers
+        self.archive_threads = max(1, cpus // workers) if numproc else cpus
+
+        # Whether to create working directories on tmpfs when it has room
+        self.tmpfs = tmpfs
+
+        # Set containing MD5 checksums of visited items. Each worker process
+        # receives its own copy, so it is never accessed concurrently and
+        # needs no lock.
         self.visited = set()
 
         # List containing tagged items to extract as 2-tuple: (tag [e.g. MD5],
@@ -82,10 +149,79 @@ class Extractor(object):
         Eliminate attributes that should not be pickled.
         """
         self_dict = self.__dict__.copy()
-        del self_dict["_pool"]
         del self_dict["_list"]
         return self_dict
 
+    @staticmethod
+    def get_pool(workers, restart=False):
+        """
+        Returns the worker pool of this process with the given number of
+        workers, starting it on first use. Any other pool of this process is
+        shut down first, as is the current one if restart is True.
+        """
+        entry = Extractor._pool
+        if entry and entry[0] == os.getpid() and entry[1] == workers and \
+            not restart:
+            return entry[2]
+
+        Extractor.shutdown_pool()
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   initializer=Extractor._init_worker,
+                                   initargs=(workers, ))
+        Extractor._pool = (os.getpid(), workers, pool)
+        return pool
+
+    @staticmethod
+    def shutdown_pool():
+        """
+        Shuts down the worker pool of this process, if any, waiting for its
+        workers to exit.
+        """
+        entry = Extractor._pool
+        Extractor._pool = None
+        # a pool inherited across fork() belongs to the parent
+        if entry and entry[0] == os.getpid():
+            entry[2].shutdown()
+
+    @staticmethod
+    def shutdown():
+        """
+        Releases the resources held by this process for extraction. Registered
+        to run at interpreter exit; may also be called directly by long-running
+        callers once they are done extracting.
+        """
+        Extractor.shutdown_pool()
+        ExtractionItem.close_databases()
+
+    @staticmethod
+    def _init_worker(workers):
+        """
+        Marks this process as a worker, and pins it and the processes it
+        spawns to its own slice of the available CPUs, on platforms that
+        support it.
+        """
+        Extractor._is_worker = True
+
+        # workers exit without running atexit handlers, so register the
+        # database cleanup with multiprocessing instead
+        multiprocessing.util.Finalize(None, ExtractionItem.close_databases,
+                                      exitpriority=10)
+
+        if not hasattr(os, "sched_setaffinity"):
+            return
+
+        identity = multiprocessing.current_process()._identity
+        if not identity:
+            return
+
+        cpus = sorted(os.sched_getaffinity(0))
+        mine = cpus[(identity[0] - 1) % workers::workers]
+        if mine:
+            try:
+                os.sched_setaffinity(0, mine)
+            except OSError:
+                pass
+
     @staticmethod
     def io_dd(indir, offset, size, outdir):
         """
@@ -95,35 +231,62 @@ class Extractor(object):
         if not size:
             return
 
+        blocksize = 1048576
         with open(indir, "rb") as ifp:
             with open(outdir, "wb") as ofp:
+                # copy in-kernel where possible, preferring copy_file_range()
+                # which can share extents on reflink-capable filesystems;
+                # falls back to sendfile() and then a read/write loop for the
+                # remainder if either is unavailable or unsupported
+                for copy_range in (_copy_file_range, _sendfile):
+                    try:
+                        while size > 0:
+                            copied = copy_range(ifp.fileno(), ofp.fileno(),
+                                                offset, size)
+                            if not copied:
+                                return
+                            offset += copied
+                            size -= copied
+                        break
+                    except (AttributeError, OSError):
+                        pass
+
                 ifp.seek(offset, 0)
-                ofp.write(ifp.read(size))
+                while size > 0:
+                    buf = ifp.read(min(size, blocksize))
+                    if not buf:
+                        break
+                    ofp.write(buf)
+                    size -= len(buf)
 
     @staticmethod
     def magic(indata, mime=False):
         """
         Performs file magic while maintaining compatibility with different
-        libraries.
+        libraries. The magic database is only loaded once per process.
         """
 
-        try:
-            if mime:
-                mymagic = magic.open(magic.MAGIC_MIME_TYPE)
-            else:
-                mymagic = magic.open(magic.MAGIC_NONE)
-            mymagic.load()
-        except AttributeError:
-            mymagic = magic.Magic(mime)
-            mymagic.file = mymagic.from_file
-        return mymagic.file(indata)
+        detect = Extractor._magic_cache.get(mime)
+        if detect is None:
+            try:
+                if mime:
+                    mymagic = magic.open(magic.MAGIC_MIME_TYPE)
+                else:
+                    mymagic = magic.open(magic.MAGIC_NONE)
+                mymagic.load()
+            except AttributeError:
+                mymagic = magic.Magic(mime)
+                mymagic.file = mymagic.from_file
+            detect = Extractor._magic_cache[mime] = mymagic.file
+        return detect(indata)
 
     @staticmethod
     def io_md5(target):
         """
-        Performs MD5 with a block size of 64kb.
+        Performs MD5, using hashlib.file_digest() where available and
+        otherwise a block size of 1MB.
         """
-        blocksize = 65536
+        blocksize = 1048576
         hasher = hashlib.md5()
 
         stat = os.stat(target)
@@ -131,12 +294,61 @@ class Extractor(object):
             hasher.update(target.encode('utf-8'))
         else:
             with open(target, 'rb') as ifp:
+                if hasattr(hashlib, "file_digest"):
+                    return hashlib.file_digest(ifp, "md5").hexdigest()
                 buf = ifp.read(blocksize)
                 while buf:
                     hasher.update(buf)
                     buf = ifp.read(blocksize)
         return hasher.hexdigest()
 
+    @staticmethod
+    def io_fadvise(target, advice):
+        """
+        Gives the kernel a POSIX_FADV_* access hint, e.g. "WILLNEED", for the
+        whole of a file. Does nothing where posix_fadvise() is unsupported.
+        """
+        if not hasattr(os, "posix_fadvise"):
+            return
+
+        try:
+            fd = os.open(target, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, getattr(os, "POSIX_FADV_" + advice))
+            finally:
+                os.close(fd)
+        except OSError:
+            pass
+
+    @staticmethod
+    def io_link(source, target):
+        """
+        Creates target as a hard link to source, or as a copy if linking is
+        not possible, e.g. across filesystems.
+        """
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+    @staticmethod
+    def io_tar(base_name, root_dir, threads=None):
+        """
+        Creates a gzip-compressed tarball 'base_name.tar.gz' of root_dir. Uses
+        tar piped through pigz for parallel compression if available,
+        otherwise falls back to shutil.make_archive().
+        """
+        if not shutil.which("pigz") or not shutil.which("tar"):
+            shutil.make_archive(base_name, "gztar", root_dir=root_dir)
+            return
+
+        compressor = "pigz -p %d" % threads if threads else "pigz"
+        # --use-compress-program, unlike -I, is understood by both GNU tar and
+        # bsdtar
+        subprocess.run(["tar", "--use-compress-program=" + compressor, "-cf",
+                        base_name + ".tar.gz", "-C", root_dir, "."],
+                       check=True)
+
     @staticmethod
     def io_rm(target):
         """
@@ -159,15 +371,15 @@ class Extractor(object):
 
         # Recurse into single directory chains, e.g. jffs2-root/fs_1/.../
         path = start
-        while (len(os.listdir(path)) == 1 and
-               os.path.isdir(os.path.join(path, os.listdir(path)[0]))):
-            path = os.path.join(path, os.listdir(path)[0])
+        entries = list(os.scandir(path))
+        while len(entries) == 1 and entries[0].is_dir():
+            path = entries[0].path
+            entries = list(os.scandir(path))
 
         # count number of unix-like directories
         count = 0
-        for subdir in os.listdir(path):
-            if subdir in Extractor.UNIX_DIRS and \
-                os.path.isdir(os.path.join(path, subdir)):
+        for entry in entries:
+            if entry.name in Extractor.UNIX_DIRS and entry.is_dir():
                 count += 1
 
         # check for extracted filesystem, otherwise update queue
@@ -177,10 +389,9 @@ class Extractor(object):
         # in some cases, multiple filesystems may be extracted, so recurse to
         # find best one
         if recurse:
-            for subdir in os.listdir(path):
-                if os.path.isdir(os.path.join(path, subdir)):
-                    res = Extractor.io_find_rootfs(os.path.join(path, subdir),
-                                                   False)
+            for entry in entries:
+                if entry.is_dir():
+                    res = Extractor.io_find_rootfs(entry.path, False)
                     if res[0]:
                         return res
 
@@ -200,29 +411,117 @@ class Extractor(object):
         else:
             logger.error("!! Cannot read file: %s", self._input)
 
+        if not self._list:
+            return []
+
         if self.output_dir and not os.path.isdir(self.output_dir):
             os.makedirs(self.output_dir)
 
-        results = []
-        if self._pool:
-            # Use starmap to collect results from _extract_item
-            mapped = self._pool.map(self._extract_item, self._list)
-            for res in mapped:
-                    results.append(res)
+        # Checksum all items up front, in parallel if possible, so that each
+        # distinct image is only extracted once. Duplicates receive the result
+        # of the first item with the same checksum, under their own tag.
+        if self.numproc:
+            checksums = self._map(Extractor.io_md5, self._list, chunksize=16)
         else:
-            for item in self._list:
-                res = self._extract_item(item)
-                results.append(res)
-        
+            checksums = [Extractor.io_md5(item) for item in self._list]
+
+        first = {}
+        for index, checksum in enumerate(checksums):
+            first.setdefault(checksum, index)
+        paths = [self._list[index] for index in first.values()]
+
+        # With neither kernel nor root filesystem requested, items complete as
+        # soon as they are tagged, which is not worth dispatching to workers,
+        # nor reading ahead for
+        if not self.do_kernel and not self.do_rootfs:
+            extracted = [self._extract_item(path, checksum)
+                         for path, checksum in zip(paths, first)]
+        elif self.numproc:
+            extracted = self._map(self._extract_item, paths, first,
+                                  chunksize=4)
+        else:
+            extracted = self._extract_serial(paths, list(first))
+
+        results = dict(zip(first, extracted))
+        return [results[checksum] if first[checksum] == index else
+                self._duplicate_result(results[checksum], path, checksum)
+                for index, (path, checksum) in
+                enumerate(zip(self._list, checksums))]
+
+    def _duplicate_result(self, result, path, checksum):
+        """
+        Returns the result for an input identical to an extracted one, given
+        the result of the latter. Tags that are database image IDs are shared
+        by identical inputs. Tags derived from the file name are not, so the
+        extracted outputs are linked under the duplicate's own tag.
+        """
+        result = dict(result)
+        tag = os.path.basename(path) + "_" + checksum
+        if not result["tag"].endswith("_" + checksum) or result["tag"] == tag:
+            return result
+
+        result["tag"] = tag
+        for key, suffix in (("kernelPath", ".kernel"), ("rootfsPath", ".tar.gz")):
+            if result[key] is None:
+                continue
+            target = os.path.join(self.output_dir, tag + suffix)
+            if os.path.isfile(result[key]) and not os.path.exists(target):
+                Extractor.io_link(result[key], target)
+            result[key] = target
+        return result
+
+    def _map(self, fn, *iterables, chunksize=1):
+        """
+        Maps a function over the given iterables in the worker pool, returning
+        the results as a list. If a worker dies, the pool is restarted for
+        later calls and BrokenProcessPool is raised.
+        """
+        try:
+            return list(Extractor.get_pool(self.workers).map(
+                fn, *iterables, chunksize=chunksize))
+        except BrokenProcessPool:
+            logger.error("!! Worker pool broken, restarting it")
+            Extractor.get_pool(self.workers, restart=True)
+            raise
+
+    def _extract_serial(self, paths, checksums):
+        """
+        Extracts items one at a time, asking the kernel to read ahead the next
+        item while the current one is extracted, and to drop the current one
+        from the page cache once it is done.
+        """
+        results = []
+        for index, path in enumerate(paths):
+            if index + 1 < len(paths):
+                Extractor.io_fadvise(paths[index + 1], "WILLNEED")
+            results.append(self._extract_item(path, checksums[index]))
+            Extractor.io_fadvise(path, "DONTNEED")
         return results
 
-    def _extract_item(self, path):
+    def _extract_item(self, path, checksum=None):
         """
         Wrapper function that creates an ExtractionItem and calls the extract()
         method.
         """
 
-        return ExtractionItem(self, path, 0).extract()
+        item = ExtractionItem(self, path, 0, checksum=checksum)
+        result = item.extract()
+
+        # wait for queued database updates, so that they are applied before
+        # the result is returned
+        if item.writer:
+            item.writer.flush()
+
+        # free the item, and any young cycles left by extraction. Pool workers
+        # also return freed heap to the OS, so that their memory use does not
+        # grow across a batch; the caller's process is left alone.
+        del item
+        gc.collect(0)
+        if Extractor._is_worker:
+            malloc_trim = _get_malloc_trim()
+            if malloc_trim:
+                malloc_trim(0)
+        return result
 
 class ExtractionItem(object):
     """
@@ -233,7 +532,43 @@ class ExtractionItem(object):
     RECURSION_BREADTH = 5
     RECURSION_DEPTH = 3
 
-    def __init__(self, extractor, path, depth, tag=None):
+    # If enabled, working directories are created on tmpfs if it has at least
+    # this multiple of the item size free for every concurrent worker, since
+    # extracted data is usually larger than its container
+    TMPFS_DIR = "/dev/shm"
+    TMPFS_HEADROOM = 16
+
+    # Blacklisted MIME-types, and file types that have MIME-type
+    # 'application/octet-stream'
+    BLACKLIST_MIME = re.compile("|".join(map(re.escape, [
+        "application/x-executable", "application/x-dosexec",
+        "application/x-object", "application/pdf", "application/msword",
+        "image/", "text/", "video/"])))
+    BLACKLIST_TYPE = re.compile("|".join(map(re.escape, [
+        "executable", "universal binary", "relocatable", "bytecode",
+        "applet"])))
+
+    # Fields parsed from uImage and TP-Link/TRX header descriptions
+    UIMAGE_SIZE = re.compile(r"image size:\s*(\d+)")
+    FIRMWARE_FIELDS = re.compile(
+        r"(kernel|rootfs) (offset|length):\s*((?:0[xX])?[0-9a-fA-F]+)")
+
+    # Magic bytes of every signature in archiveSignatures: zip, rar, tarball,
+    # cab, cpio (new ASCII, CRC and old ASCII) and 7zip. Files without any of
+    # them are not passed to binwalk.
+    ARCHIVE_MAGIC = (b"PK\x03\x04", b"Rar!\x1a\x07", b"ustar", b"MSCF",
+                     b"070701", b"070702", b"070707", b"7z\xbc\xaf\x27\x1c")
+
+    # Database connections and background writers opened by this process,
+    # keyed by (PID, server, port)
+    _databases = {}
+    _writers = {}
+
+    # AES-128-CBC key and IV for D-Link 'SHRS' encrypted firmware
+    DLINK_SHRS_KEY = bytes.fromhex("c05fbf1936c99429ce2a0781f08d6ad8")
+    DLINK_SHRS_IV = bytes.fromhex("67c6697351ff4aec29cdbaabf2fbe346")
+
+    def __init__(self, extractor, path, depth, tag=None, checksum=None):
         # Temporary directory
         self.temp = None
 
@@ -243,26 +578,33 @@ class ExtractionItem(object):
         # Reference to parent extractor object
         self.extractor = extractor
 
-        # File path
+        # File path, and its encoded form for the magic library
         self.item = path
+        self.item_bytes = os.fsencode(path)
+
+        # File size; the file is not modified during extraction
+        self.size = os.path.getsize(path)
 
         # Database connection
         if self.extractor.database:
-            import psycopg2
             try:
-                self.database = psycopg2.connect(database="firmware",
-                                                user="femu",
-                                                password="femu",
-                                                host=self.extractor.database,
-                                                port=self.extractor.port)
+                self.database = ExtractionItem.get_database(
+                    self.extractor.database, self.extractor.port)
+                self.writer = ExtractionItem.get_writer(
+                    self.extractor.database, self.extractor.port)
             except Exception:
                 self.database = None
+                self.writer = None
                 logger.error("!! Cannot connect to database %s:%d!", self.extractor.database, self.extractor.port)
         else:
             self.database = None
+            self.writer = None
 
-        # Checksum
-        self.checksum = Extractor.io_md5(path)
+        # Checksum, unless already computed by the caller. Items that inherit
+        # a tag are only hashed once extract() gets to the visited check.
+        self.checksum = checksum
+        if not self.checksum and not tag:
+            self.checksum = Extractor.io_md5(path)
 
         # Tag
         self.tag = tag if tag else self.generate_tag()
@@ -277,20 +619,71 @@ class ExtractionItem(object):
         self.update_status()
 
     def __del__(self):
-        if self.database:
-            self.database.close()
-
         if self.temp:
-            self.printf(">> Cleaning up %s..." % self.temp)
+            self.printf(">> Cleaning up %s...", self.temp)
             Extractor.io_rm(self.temp)
 
-    def printf(self, fmt):
+    @staticmethod
+    def get_database(server, port):
+        """
+        Returns the database connection of this process, connecting on first
+        use. Connections are shared by all items in a process, including
+        recursed items, instead of being opened per item.
+        """
+        # key on the PID, since a connection inherited across fork() must not
+        # be used by the child
+        key = (os.getpid(), server, port)
+        database = ExtractionItem._databases.get(key)
+        if database is None or database.closed:
+            import psycopg2
+            database = psycopg2.connect(database="firmware", user="femu",
+                                        password="femu", host=server,
+                                        port=port)
+            ExtractionItem._databases[key] = database
+        return database
+
+    @staticmethod
+    def get_writer(server, port):
+        """
+        Returns the background database writer of this process, starting it
+        on first use or if the previous writer stopped or lost its connection.
+        """
+        key = (os.getpid(), server, port)
+        writer = ExtractionItem._writers.get(key)
+        if writer is None or not writer.is_alive() or writer.database.closed:
+            writer = DatabaseWriter(server, port)
+            ExtractionItem._writers[key] = writer
+        return writer
+
+    @staticmethod
+    def close_databases():
+        """
+        Stops the background database writers and closes the database
+        connections opened by this process. Both are reopened on next use.
         """
-        Prints output string with appropriate depth indentation.
+        pid = os.getpid()
+        writers, ExtractionItem._writers = ExtractionItem._writers, {}
+        databases, ExtractionItem._databases = ExtractionItem._databases, {}
+
+        # connections inherited across fork() belong to the parent
+        for key, writer in writers.items():
+            if key[0] == pid:
+                writer.close()
+        for key, database in databases.items():
+            if key[0] == pid and not database.closed:
+                try:
+                    database.close()
+                except Exception:
+                    traceback.print_exc()
+
+    def printf(self, fmt, *args):
         """
-        if self.extractor.quiet:
+        Prints output string with appropriate depth indentation. Formatting
+        with args is deferred until the message is actually logged.
+        """
+        if self.extractor.quiet or not logger.isEnabledFor(logging.DEBUG):
             return
-        logger.debug("%s%s", "\t" * self.depth, fmt)
+        logger.debug("\t" * self.depth + fmt, *args)
 
     def generate_tag(self):
         """
@@ -333,7 +726,7 @@ class ExtractionItem(object):
                 cur.close()
 
         if image_id:
-            self.printf(">> Database Image ID: %s" % image_id[0])
+            self.printf(">> Database Image ID: %s", image_id[0])
 
         return str(image_id[0]) if \
                image_id else os.path.basename(self.item) + "_" + self.checksum
@@ -360,13 +753,19 @@ class ExtractionItem(object):
         rootfs_done = os.path.isfile(self.get_rootfs_path()) if \
             self.extractor.do_rootfs and self.output else \
             not self.extractor.do_rootfs
-        self.status = (kernel_done, rootfs_done)
 
-        if self.database and kernel_done and self.extractor.do_kernel:
-            self.update_database("kernel_extracted", "True")
+        # only write flags that have just been set, since update_status() is
+        # called again after every extraction attempt
+        if self.database:
+            fields = {}
+            if kernel_done and not self.status[0] and self.extractor.do_kernel:
+                fields["kernel_extracted"] = "True"
+            if rootfs_done and not self.status[1] and self.extractor.do_rootfs:
+                fields["rootfs_extracted"] = "True"
+            if fields:
+                self.update_database_fields(fields)
 
-        if self.database and rootfs_done and self.extractor.do_rootfs:
-            self.update_database("rootfs_extracted", "True")
+        self.status = (kernel_done, rootfs_done)
 
         return self.get_status()
 
@@ -374,22 +773,17 @@ class ExtractionItem(object):
         """
         Update a given field in the database.
         """
-        ret = True
-        if self.database:
-            cur = None
-            try:
-                cur = self.database.cursor()
-                cur.execute("UPDATE image SET " + field + "='" + value +
-                            "' WHERE id=%s", (self.tag, ))
-                self.database.commit()
-            except BaseException:
-                ret = False
-                traceback.print_exc()
-                self.database.rollback()
-            finally:
-                if cur:
-                    cur.close()
-        return ret
+        return self.update_database_fields({field: value})
+
+    def update_database_fields(self, fields):
+        """
+        Queue an update of the given mapping of fields to values in the
+        database. The update is applied asynchronously by the background
+        writer.
+        """
+        if self.writer:
+            self.writer.put(self.tag, fields)
+        return True
 
     def get_status(self):
         """
@@ -398,6 +792,24 @@ class ExtractionItem(object):
         """
         return True if self.terminate or all(i for i in self.status) else False
 
+    def get_temp_root(self):
+        """
+        Return the directory in which to create the working directory. Uses
+        tmpfs if enabled, it has enough free space and no temporary directory
+        is set in the environment, otherwise None for the default temporary
+        directory.
+        """
+        if not self.extractor.tmpfs or \
+            any(os.environ.get(v) for v in ("TMPDIR", "TEMP", "TMP")) or \
+            not os.access(ExtractionItem.TMPFS_DIR, os.W_OK):
+            return None
+
+        free = shutil.disk_usage(ExtractionItem.TMPFS_DIR).free
+        if free < self.size * ExtractionItem.TMPFS_HEADROOM * \
+            self.extractor.workers:
+            return None
+        return ExtractionItem.TMPFS_DIR
+
     def get_kernel_path(self):
         """
         Return the full path (including filename) to the output kernel file.
@@ -411,59 +823,59 @@ class ExtractionItem(object):
         """
         return self.output + ".tar.gz" if self.output else None
 
+    def get_result(self, status):
+        """
+        Return the result dictionary of this item, with the given overall
+        status.
+        """
+        return {"status": status, "tag": self.tag,
+                "kernelDone": self.status[0],
+                "rootfsDone": self.status[1],
+                "kernelPath": self.get_kernel_path(),
+                "rootfsPath": self.get_rootfs_path()}
+
     def extract(self) -> dict[str, bool | str | None]:
         """
         Perform the actual extraction of firmware updates, recursively. Returns
         True if extraction complete, otherwise False.
         """
-        self.printf("\n" + self.item.encode("utf-8", "replace").decode("utf-8"))
+        if not self.extractor.quiet and logger.isEnabledFor(logging.DEBUG):
+            self.printf("\n%s", self.item.encode("utf-8", "replace").decode("utf-8"))
 
         # check if item is complete
         if self.get_status():
             self.printf(">> Skipping: completed!")
-            return {"status": True, "tag": self.tag, "kernelDone": self.get_kernel_status(),
-                    "rootfsDone": self.get_rootfs_status(), "kernelPath": self.get_kernel_path(),
-                    "rootfsPath": self.get_rootfs_path()}
+            return self.get_result(True)
 
         # check if exceeding recursion depth
         if self.depth > ExtractionItem.RECURSION_DEPTH:
-            self.printf(">> Skipping: recursion depth %d" % self.depth)
-            return {"status": self.get_status(), "tag": self.tag, "kernelDone": self.get_kernel_status(),
-                    "rootfsDone": self.get_rootfs_status(), "kernelPath": self.get_kernel_path(),
-                    "rootfsPath": self.get_rootfs_path()}
+            self.printf(">> Skipping: recursion depth %d", self.depth)
+            return self.get_result(self.get_status())
 
         # check if checksum is in visited set
-        self.printf(">> MD5: %s" % self.checksum)
-        with Extractor.visited_lock:
-            if self.checksum in self.extractor.visited:
-                self.printf(">> Skipping: %s..." % self.checksum)
-                return {"status": self.get_status(), "tag": self.tag,
-                        "kernelDone": self.get_kernel_status(),
-                        "rootfsDone": self.get_rootfs_status(),
-                        "kernelPath": self.get_kernel_path(),
-                        "rootfsPath": self.get_rootfs_path()}
-            else:
-                self.extractor.visited.add(self.checksum)
+        if not self.checksum:
+            self.checksum = Extractor.io_md5(self.item)
+        self.printf(">> MD5: %s", self.checksum)
+        if self.checksum in self.extractor.visited:
+            self.printf(">> Skipping: %s...", self.checksum)
+            return self.get_result(self.get_status())
+        self.extractor.visited.add(self.checksum)
 
         # check if filetype is blacklisted
         if self._check_blacklist():
-            return {"status": self.get_status(), "tag": self.tag,
-                    "kernelDone": self.get_kernel_status(),
-                    "rootfsDone": self.get_rootfs_status(),
-                    "kernelPath": self.get_kernel_path(),
-                    "rootfsPath": self.get_rootfs_path()}
+            return self.get_result(self.get_status())
 
         # create working directory
-        self.temp = tempfile.mkdtemp()
+        self.temp = tempfile.mkdtemp(dir=self.get_temp_root())
 
         try:
-            self.printf(">> Tag: %s" % self.tag)
-            self.printf(">> Temp: %s" % self.temp)
+            self.printf(">> Tag: %s", self.tag)
+            self.printf(">> Temp: %s", self.temp)
             self.printf(">> Status: Kernel: %s, Rootfs: %s, Do_Kernel: %s, \
-                Do_Rootfs: %s" % (self.get_kernel_status(),
-                                  self.get_rootfs_status(),
-                                  self.extractor.do_kernel,
-                                  self.extractor.do_rootfs))
+                Do_Rootfs: %s", self.get_kernel_status(),
+                        self.get_rootfs_status(),
+                        self.extractor.do_kernel,
+                        self.extractor.do_rootfs)
 
             for analysis in [self._check_archive, self._check_encryption, self._check_firmware,
                              self._check_kernel, self._check_rootfs,
@@ -473,49 +885,34 @@ class ExtractionItem(object):
                 if analysis():
                     if self.update_status():
                         self.printf(">> Skipping: completed!")
-                        return {"status": True, "tag": self.tag,
-                                "kernelDone": self.get_kernel_status(),
-                                "rootfsDone": self.get_rootfs_status(),
-                                "kernelPath": self.get_kernel_path(),
-                                "rootfsPath": self.get_rootfs_path()}
+                        return self.get_result(True)
 
         except Exception:
             traceback.print_exc()
 
-        return {"status": False, "tag": self.tag,
-                "kernelDone": self.get_kernel_status(),
-                "rootfsDone": self.get_rootfs_status(),
-                "kernelPath": self.get_kernel_path(),
-                "rootfsPath": self.get_rootfs_path()}
+        return self.get_result(False)
 
     def _check_blacklist(self):
         """
         Check if this file is blacklisted for analysis based on file type.
         """
         # First, use MIME-type to exclude large categories of files
-        filetype = Extractor.magic(self.item.encode("utf-8", "surrogateescape"),
-                                   mime=True)
-        if any(s in filetype for s in ["application/x-executable",
-                                       "application/x-dosexec",
-                                       "application/x-object",
-                                       "application/pdf",
-                                       "application/msword",
-                                       "image/", "text/", "video/"]):
-            self.printf(">> Skipping: %s..." % filetype)
+        filetype = Extractor.magic(self.item_bytes, mime=True)
+        if ExtractionItem.BLACKLIST_MIME.search(filetype):
+            self.printf(">> Skipping: %s...", filetype)
             return True
 
         # Next, check for specific file types that have MIME-type
         # 'application/octet-stream'
-        filetype = Extractor.magic(self.item.encode("utf-8", "surrogateescape"))
-        if any(s in filetype for s in ["executable", "universal binary",
-                                       "relocatable", "bytecode", "applet"]):
-            self.printf(">> Skipping: %s..." % filetype)
+        filetype = Extractor.magic(self.item_bytes)
+        if ExtractionItem.BLACKLIST_TYPE.search(filetype):
+            self.printf(">> Skipping: %s...", filetype)
             return True
 
         # Finally, check for specific file extensions that would be incorrectly
         # identified
         if self.item.endswith(".dmg"):
-            self.printf(">> Skipping: %s..." % (self.item))
+            self.printf(">> Skipping: %s...", self.item)
             return True
 
         return False
@@ -525,21 +922,51 @@ class ExtractionItem(object):
         If this file is an archive, recurse over its contents, unless it matches
         an extracted root filesystem.
         """
+        if not self._has_magic(ExtractionItem.ARCHIVE_MAGIC):
+            return False
         return self._check_recursive(archiveSignatures)
 
+    def _has_magic(self, magics):
+        """
+        Returns True if this file contains any of the given magic byte strings,
+        or cannot be scanned.
+        """
+        if not self.size:
+            return False
+
+        try:
+            with open(self.item, "rb") as ifp, \
+                mmap.mmap(ifp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return any(mm.find(m) != -1 for m in magics)
+        except (OSError, ValueError):
+            return True
+
     def _check_encryption(self):
-        header = b""
-        with open(self.item, "rb") as f:
-            header = f.read(4)
+        """
+        If this file is D-Link encrypted firmware, decrypt it.
+        """
+        with open(self.item, "rb") as ifp:
+            if ifp.read(4) != b"SHRS":
+                return False
 
-        if header == b"SHRS":
-            self.printf(">>>> Found D-Link encrypted firmware in %s!" % (self.item))
+            self.printf(">>>> Found D-Link encrypted firmware in %s!", self.item)
 
             # Source: https://github.com/0xricksanchez/dlink-decrypt
-            command = 'dd if=%s skip=1756 iflag=skip_bytes status=none | openssl aes-128-cbc -d -nopad -nosalt -K "c05fbf1936c99429ce2a0781f08d6ad8" -iv "67c6697351ff4aec29cdbaabf2fbe346" --nosalt -in /dev/stdin -out %s > /dev/null 2>&1' % (self.item, os.path.join(self.temp, "dlink_decrypt"))
-            os.system(command)
-            return True
-        return False
+            from cryptography.hazmat.primitives.ciphers import (Cipher,
+                                                                algorithms,
+                                                                modes)
+            decryptor = Cipher(algorithms.AES(ExtractionItem.DLINK_SHRS_KEY),
+                               modes.CBC(ExtractionItem.DLINK_SHRS_IV)).decryptor()
+
+            # no padding; a trailing partial block is dropped, as with
+            # 'openssl -nopad'
+            ifp.seek(1756, 0)
+            with open(os.path.join(self.temp, "dlink_decrypt"), "wb") as ofp:
+                buf = ifp.read(1048576)
+                while buf:
+                    ofp.write(decryptor.update(buf))
+                    buf = ifp.read(1048576)
+        return True
 
     def _check_firmware(self):
         """
@@ -554,14 +981,13 @@ class ExtractionItem(object):
                     kernel_offset = entry.offset + 64
                     kernel_size = 0
 
-                    for stmt in entry.description.split(','):
-                        if "image size:" in stmt:
-                            kernel_size = int(''.join(
-                                i for i in stmt if i.isdigit()), 10)
+                    match = ExtractionItem.UIMAGE_SIZE.search(entry.description)
+                    if match:
+                        kernel_size = int(match.group(1), 10)
 
                     if kernel_size != 0 and kernel_offset + kernel_size \
-                        <= os.path.getsize(self.item):
-                        self.printf(">>>> %s" % entry.description)
+                        <= self.size:
+                        self.printf(">>>> %s", entry.description)
 
                         tmp_fd, tmp_path = tempfile.mkstemp(dir=self.temp)
                         os.close(tmp_fd)
@@ -582,33 +1008,26 @@ class ExtractionItem(object):
                 not self.get_rootfs_status() and \
                 "rootfs offset: " in entry.description and \
                 "kernel offset: " in entry.description:
-                kernel_offset = 0
-                kernel_size = 0
-                rootfs_offset = 0
-                rootfs_size = 0
-
-                for stmt in entry.description.split(','):
-                    if "kernel offset:" in stmt:
-                        kernel_offset = int(stmt.split(':')[1], 16)
-                    elif "kernel length:" in stmt:
-                        kernel_size = int(stmt.split(':')[1], 16)
-                    elif "rootfs offset:" in stmt:
-                        rootfs_offset = int(stmt.split(':')[1], 16)
-                    elif "rootfs length:" in stmt:
-                        rootfs_size = int(stmt.split(':')[1], 16)
+                fields = {(part, field): int(value, 16) for part, field, value
+                          in ExtractionItem.FIRMWARE_FIELDS.findall(
+                              entry.description)}
+                kernel_offset = fields.get(("kernel", "offset"), 0)
+                kernel_size = fields.get(("kernel", "length"), 0)
+                rootfs_offset = fields.get(("rootfs", "offset"), 0)
+                rootfs_size = fields.get(("rootfs", "length"), 0)
 
                 # compute sizes if only offsets provided
                 if kernel_offset != rootfs_size and kernel_size == 0 and \
                     rootfs_size == 0:
                     kernel_size = rootfs_offset - kernel_offset
-                    rootfs_size = os.path.getsize(self.item) - rootfs_offset
+                    rootfs_size = self.size - rootfs_offset
 
                 # ensure that computed values are sensible
                 if (kernel_size > 0 and kernel_offset + kernel_size \
-                    <= os.path.getsize(self.item)) and \
+                    <= self.size) and \
                     (rootfs_size != 0 and rootfs_offset + rootfs_size \
-                        <= os.path.getsize(self.item)):
-                    self.printf(">>>> %s" % entry.description)
+                        <= self.size):
+                    self.printf(">>>> %s", entry.description)
 
                     tmp_fd, tmp_path = tempfile.mkstemp(dir=self.temp)
                     os.close(tmp_fd)
@@ -642,16 +1061,17 @@ class ExtractionItem(object):
                     if "Linux" in entry.description:
                         kernel_path = self.get_kernel_path()
                         if kernel_path is not None:
-                            shutil.copy(self.item, kernel_path)
+                            Extractor.io_dd(self.item, 0, self.size,
+                                            kernel_path)
+                            shutil.copymode(self.item, kernel_path)
                         else:
                             self.extractor.do_kernel = False
-                        self.printf(">>>> %s" % entry.description)
+                        self.printf(">>>> %s", entry.description)
                         return True
                     # VxWorks, etc
                     else:
-                        self.printf(">>>> Ignoring: %s" % entry.description)
+                        self.printf(">>>> Ignoring: %s", entry.description)
                         return False
-                return False
         return False
 
     def _check_rootfs(self):
@@ -660,18 +1080,17 @@ class ExtractionItem(object):
         """
 
         if not self.get_rootfs_status():
-            # work-around issue with binwalk signature definitions for ubi
-            for entry in runBinwalk(self.item, extract=True, includeSignatures=ubiSignatures + rootfsSignatures, outputDirectory=str(self.temp)):
+            for entry in runBinwalk(self.item, extract=True, includeSignatures=filesystemSignatures, outputDirectory=str(self.temp)):
                 if entry.extractionDetails and entry.extractionDetails.success:
                     unix = Extractor.io_find_rootfs(entry.extractionDetails.outputDir)
 
                     if not unix[0]:
                         return False
 
-                    self.printf(">>>> Found Linux filesystem in %s!" % unix[1])
+                    self.printf(">>>> Found Linux filesystem in %s!", unix[1])
                     if self.output:
-                        shutil.make_archive(self.output, "gztar",
-                                            root_dir=unix[1])
+                        Extractor.io_tar(self.output, unix[1],
+                                         self.extractor.archive_threads)
                     else:
                         self.extractor.do_rootfs = False
                     return True
@@ -711,37 +1130,36 @@ class ExtractionItem(object):
 
                 # check for extracted filesystem, otherwise update queue
                 if unix[0]:
-                    self.printf(">>>> Found Linux filesystem in %s!" % unix[1])
+                    self.printf(">>>> Found Linux filesystem in %s!", unix[1])
                     if self.output:
-                        shutil.make_archive(self.output, "gztar",
-                                            root_dir=unix[1])
+                        Extractor.io_tar(self.output, unix[1],
+                                         self.extractor.archive_threads)
                     else:
                         self.extractor.do_rootfs = False
                     return True
                 else:
+                    # handle case where original file name is restored; put
+                    # it to front of queue
+                    orig = None
+                    if desc and "original file name:" in desc:
+                        for stmt in desc.split(","):
+                            if "original file name:" in stmt:
+                                orig = stmt.split("\"")[1]
+
                     count = 0
-                    self.printf(">> Recursing into %s ..." % entry.extractionDetails.outputDir)
+                    self.printf(">> Recursing into %s ...", entry.extractionDetails.outputDir)
                     for root, _, files in os.walk(entry.extractionDetails.outputDir):
-                        # sort both descending alphabetical and increasing
-                        # length
-                        files.sort()
-                        files.sort(key=len)
-
-                        # handle case where original file name is restored; put
-                        # it to front of queue
-                        if desc and "original file name:" in desc:
-                            orig = None
-                            for stmt in desc.split(","):
-                                if "original file name:" in stmt:
-                                    orig = stmt.split("\"")[1]
-                            if orig and orig in files:
-                                files.remove(orig)
-                                files.insert(0, orig)
+                        # sort by increasing length, then alphabetically
+                        files.sort(key=lambda f: (len(f), f))
+
+                        if orig and orig in files:
+                            files.remove(orig)
+                            files.insert(0, orig)
 
                         for filename in files:
                             if count > ExtractionItem.RECURSION_BREADTH:
-                                self.printf(">> Skipping: recursion breadth %d"\
-                                    % ExtractionItem.RECURSION_BREADTH)
+                                self.printf(">> Skipping: recursion breadth %d",
+                                            ExtractionItem.RECURSION_BREADTH)
                                 self.terminate = True
                                 return True
                             else:
@@ -760,8 +1178,160 @@ class ExtractionItem(object):
                             count += 1
         return False
 
+class DatabaseWriter(object):
+    """
+    Background thread that applies image updates using its own database
+    connection, so that extraction does not block on database round-trips.
+    """
+
+    def __init__(self, server, port):
+        import psycopg2
+        self.database = psycopg2.connect(database="firmware", user="femu",
+                                         password="femu", host=server,
+                                         port=port)
+        self._queue = queue.Queue(maxsize=64)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def is_alive(self):
+        """
+        Returns True if the writer thread is still running.
+        """
+        return self._thread.is_alive()
+
+    def put(self, tag, fields):
+        """
+        Queue an update of the given mapping of fields to values for the image
+        with the given tag. The update is dropped if the writer thread has
+        stopped.
+        """
+        while self.is_alive():
+            try:
+                self._queue.put((tag, fields), timeout=1)
+                return
+            except queue.Full:
+                pass
+        logger.error("!! Database writer stopped, dropping update of %s", tag)
+
+    def flush(self):
+        """
+        Block until all queued updates have been applied, or the writer thread
+        has stopped.
+        """
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks and self.is_alive():
+                self._queue.all_tasks_done.wait(1)
+
+    def close(self):
+        """
+        Applies any queued updates, then stops the writer thread and closes
+        its connection.
+        """
+        self.flush()
+        while self.is_alive():
+            try:
+                self._queue.put(None, timeout=1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join(timeout=10)
+
+        if not self.is_alive() and not self.database.closed:
+            try:
+                self.database.close()
+            except Exception:
+                traceback.print_exc()
+
+    def _run(self):
+        """
+        Applies queued updates until close() queues None. Updates that are
+        queued while a batch is being written are applied together as the next
+        batch.
+        """
+        stop = False
+        while not stop:
+            queued = [self._queue.get()]
+            while True:
+                try:
+                    queued.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in queued
+            updates = [update for update in queued if update is not None]
+            try:
+                if updates:
+                    self._update(updates)
+            except BaseException:
+                # never let a failed batch stop the thread, since callers
+                # wait on it in flush()
+                traceback.print_exc()
+            finally:
+                for _ in queued:
+                    self._queue.task_done()
+
+    def _update(self, updates):
+        """
+        Apply a list of (tag, fields) updates to the database in a single
+        transaction. Updates to the same image are merged, and images updating
+        the same set of fields share one batched statement. If the transaction
+        fails, the updates are retried one by one, so that a bad value only
+        loses its own update.
+        """
+        pending = {}
+        for tag, fields in updates:
+            pending.setdefault(tag, {}).update(fields)
+
+        if self._execute(pending.items()) or len(updates) == 1:
+            return
+
+        for tag, fields in updates:
+            if self.database.closed:
+                break
+            self._execute([(tag, fields)])
+
+    def _execute(self, updates):
+        """
+        Apply (tag, fields) updates to the database in a single transaction,
+        batching updates of the same set of fields into one statement. Returns
+        True on success, otherwise rolls back and returns False.
+        """
+        from psycopg2 import sql
+        from psycopg2.extras import execute_batch
+
+        batches = {}
+        for tag, fields in updates:
+            batches.setdefault(tuple(fields), []).append(
+                list(fields.values()) + [tag])
+
+        ret = True
+        cur = None
+        try:
+            cur = self.database.cursor()
+            for names, rows in batches.items():
+                execute_batch(cur, sql.SQL("UPDATE image SET {} WHERE id=%s").format(
+                    sql.SQL(", ").join(sql.SQL("{}=%s").format(sql.Identifier(f))
+                                       for f in names)), rows)
+            self.database.commit()
+        except BaseException:
+            ret = False
+            traceback.print_exc()
+            if not self.database.closed:
+                try:
+                    self.database.rollback()
+                except Exception:
+                    traceback.print_exc()
+        finally:
+            if cur:
+                try:
+                    cur.close()
+                except Exception:
+                    pass
+        return ret
+
 def extract(input_file, output_dir=None, filesystem=True, kernel=True,
-            numproc=False, brand=None, sqlIP=None,  sqlPort=5432, quiet=False) -> list[dict[str, bool | str | None]]:
+            numproc=False, brand=None, sqlIP=None,  sqlPort=5432, quiet=False,
+            jobs=None, tmpfs=False) -> list[dict[str, bool | str | None]]:
     """
     Extracts the kernel and root filesystem from a given input file or
     directory to the specified output directory.
@@ -776,11 +1346,18 @@ def extract(input_file, output_dir=None, filesystem=True, kernel=True,
     :param sqlIP: Hostname of the SQL server to store extraction details.
     :param sqlPort: Port of the SQL server.
     :param quiet: If True, suppresses output messages.  
+    :param jobs: Maximum number of worker processes when numproc is True,
+        at least 1. Defaults to the number of CPUs.
+    :param tmpfs: If True, creates working directories on tmpfs (/dev/shm)
+        when it has enough free space.
     
     :return: A list of dictionaries containing extraction results, each with
         keys:
         - status: True if extraction is complete, False otherwise
-        - tag: Unique identifier for the extraction item
+        - tag: Unique identifier for the extraction item. Identical input
+          files are only extracted once; when tags are database image IDs
+          they share one tag and one set of output paths, otherwise each gets
+          its own tag, with the outputs linked under it
         - kernelDone: True if kernel extraction is complete or not requested, False otherwise
         - rootfsDone: True if root filesystem extraction is complete or not requested, False otherwise
         - kernelPath: Path to the extracted kernel file, or None if not extracted
@@ -788,10 +1365,28 @@ def extract(input_file, output_dir=None, filesystem=True, kernel=True,
     
     """
     extractor = Extractor(input_file, output_dir, filesystem, kernel, numproc,
-                          sqlIP, brand, sqlPort, quiet)
+                          sqlIP, brand, sqlPort, quiet, jobs, tmpfs)
     return extractor.extract()
 
-def main():
+def _positive_int(value):
+    """
+    Argument type for integers of at least 1.
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid integer: %s" % value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1: %s" % value)
+    return number
+
+atexit.register(Extractor.shutdown)
+
+@functools.lru_cache(maxsize=None)
+def _get_parser():
+    """
+    Returns the command-line argument parser, building it on first use.
+    """
     parser = argparse.ArgumentParser(description="Extracts filesystem and \
         kernel from Linux-based firmware images")
     parser.add_argument("input", action="store", help="Input file or directory")
@@ -810,15 +1405,25 @@ def main():
     parser.add_argument("-np", dest="parallel", action="store_false",
                         default=True, help="Disable parallel operation \
                         (may increase extraction time)")
+    parser.add_argument("-j", "--jobs", dest="jobs", action="store",
+                        default=None, type=_positive_int, help="Maximum number of \
+                        parallel workers (default: number of CPUs)")
+    parser.add_argument("--tmpfs", dest="tmpfs", action="store_true",
+                        default=False, help="Create working directories on \
+                        tmpfs when it has enough free space (uses memory)")
     parser.add_argument("-b", dest="brand", action="store", default=None,
                         help="Brand of the firmware image")
     parser.add_argument("-q", "--quiet", dest="quiet", action="store_true",
                         default=False, help="Suppress output messages")
-    result = parser.parse_args()
+    return parser
+
+def main():
+    result = _get_parser().parse_args()
 
     extract = Extractor(result.input, result.output, result.rootfs,
                         result.kernel, result.parallel, result.sql,
-                        result.brand, result.port, result.quiet)
+                        result.brand, result.port, result.quiet,
+                        result.jobs, result.tmpfs)
     extract.extract()
 
 if __name__ == "__main__":
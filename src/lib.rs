@@ -25,89 +25,98 @@ pub fn run_binwalk(
         ));
     }
 
-    let results: AnalysisResults = if extract {
-        let outdir = output_directory.unwrap_or_else(|| {
-            file_path_buf
-                .parent()
-                .map(|p| p.to_string_lossy().into_owned())
-                .unwrap_or_else(|| ".".to_string())
-        });
+    // Release the GIL while binwalk scans/extracts so that runBinwalk can be
+    // called concurrently from multiple Python threads.
+    let results: AnalysisResults = py.allow_threads(|| -> PyResult<AnalysisResults> {
+        if extract {
+            let outdir = output_directory.unwrap_or_else(|| {
+                file_path_buf
+                    .parent()
+                    .map(|p| p.to_string_lossy().into_owned())
+                    .unwrap_or_else(|| ".".to_string())
+            });
 
-        // configure() creates a symlink <outdir>/<filename> -> target file.
-        // If runBinwalk is called multiple times on the same file with the same
-        // output dir (e.g. archive pass then rootfs pass), the second call fails
-        // because the symlink already exists. Remove it first.
-        if let Some(fname) = file_path_buf.file_name() {
-            let symlink = PathBuf::from(&outdir).join(fname);
-            if symlink.is_symlink() {
-                let _ = fs::remove_file(&symlink);
+            // configure() creates a symlink <outdir>/<filename> -> target file.
+            // If runBinwalk is called multiple times on the same file with the same
+            // output dir (e.g. archive pass then rootfs pass), the second call fails
+            // because the symlink already exists. Remove it first.
+            if let Some(fname) = file_path_buf.file_name() {
+                let symlink = PathBuf::from(&outdir).join(fname);
+                if symlink.is_symlink() {
+                    let _ = fs::remove_file(&symlink);
+                }
             }
-        }
 
-        let binwalker = Binwalk::configure(
-            Some(file_path.clone()),
-            Some(outdir),
-            include_signatures,
-            exclude_signatures,
-            None,
-            false,
-        )
-        .map_err(|_| {
-            PyErr::new::<pyo3::exceptions::PyRuntimeError, _>("Failed to configure binwalk")
-        })?;
+            let binwalker = Binwalk::configure(
+                Some(file_path.clone()),
+                Some(outdir),
+                include_signatures,
+                exclude_signatures,
+                None,
+                false,
+            )
+            .map_err(|_| {
+                PyErr::new::<pyo3::exceptions::PyRuntimeError, _>("Failed to configure binwalk")
+            })?;
 
-        // Use base_target_file (the symlink inside output dir) so extracted files
-        // land inside the configured output directory.
-        let target = binwalker.base_target_file.clone();
-        binwalker.analyze(&target, true)
-    } else {
-        let binwalker = Binwalk::configure(
-            None,
-            None,
-            include_signatures,
-            exclude_signatures,
-            None,
-            false,
-        )
-        .map_err(|_| {
-            PyErr::new::<pyo3::exceptions::PyRuntimeError, _>("Failed to configure binwalk")
-        })?;
+            // Use base_target_file (the symlink inside output dir) so extracted files
+            // land inside the configured output directory.
+            let target = binwalker.base_target_file.clone();
+            Ok(binwalker.analyze(&target, true))
+        } else {
+            let binwalker = Binwalk::configure(
+                None,
+                None,
+                include_signatures,
+                exclude_signatures,
+                None,
+                false,
+            )
+            .map_err(|_| {
+                PyErr::new::<pyo3::exceptions::PyRuntimeError, _>("Failed to configure binwalk")
+            })?;
 
-        let file_data = fs::read(&file_path_buf).map_err(|e| {
-            PyErr::new::<pyo3::exceptions::PyIOError, _>(format!(
-                "Failed to read file {}: {}",
-                file_path, e
-            ))
-        })?;
+            let file_data = fs::read(&file_path_buf).map_err(|e| {
+                PyErr::new::<pyo3::exceptions::PyIOError, _>(format!(
+                    "Failed to read file {}: {}",
+                    file_path, e
+                ))
+            })?;
 
-        AnalysisResults {
-            file_path: file_path.clone(),
-            file_map: binwalker.scan(&file_data),
-            extractions: HashMap::new(),
+            Ok(AnalysisResults {
+                file_path: file_path.clone(),
+                file_map: binwalker.scan(&file_data),
+                extractions: HashMap::new(),
+            })
         }
-    };
+    })?;
 
-    let mut py_results = Vec::new();
+    // Each match is returned as a flat tuple laid out like the Python
+    // DetectedFile NamedTuple: (offset, id, size, confidence, description,
+    // extraction), where extraction is None or (size, success, extractor,
+    // output_dir) laid out like ExtractedFile.
+    let mut py_results = Vec::with_capacity(results.file_map.len());
     for sig in &results.file_map {
-        let dict = pyo3::types::PyDict::new_bound(py);
-        dict.set_item("offset", sig.offset as u64)?;
-        dict.set_item("id", sig.id.clone())?;
-        dict.set_item("size", sig.size as u64)?;
-        dict.set_item("confidence", (sig.confidence as f64) / 100.0)?;
-        dict.set_item("description", sig.description.clone())?;
-
-        if let Some(ext) = results.extractions.get(&sig.id) {
-            let ext_dict = pyo3::types::PyDict::new_bound(py);
-            ext_dict.set_item("size", ext.size.unwrap_or(0) as u64)?;
-            ext_dict.set_item("success", ext.success)?;
-            ext_dict.set_item("extractor", ext.extractor.clone())?;
-            ext_dict.set_item("output_dir", ext.output_directory.clone())?;
-            dict.set_item("extraction_details", ext_dict)?;
-        } else {
-            dict.set_item("extraction_details", py.None())?;
-        }
+        let extraction = results.extractions.get(&sig.id).map(|ext| {
+            (
+                ext.size.unwrap_or(0) as u64,
+                ext.success,
+                ext.extractor.clone(),
+                ext.output_directory.clone(),
+            )
+        });
 
-        py_results.push(dict.into());
+        py_results.push(
+            (
+                sig.offset as u64,
+                sig.id.clone(),
+                sig.size as u64,
+                (sig.confidence as f64) / 100.0,
+                sig.description.clone(),
+                extraction,
+            )
+                .into_py(py),
+        );
     }
 
     Ok(py_results)